@@ -3,28 +3,86 @@ from __future__ import annotations
 
 import asyncio
 import json
+import os
+import time
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
+
+import httpx
 from fastmcp import Client
+from fastmcp.client.transports import StreamableHttpTransport
+
+
+# Connection pool for the underlying httpx client. The httpx defaults
+# (100 connections / 20 keep-alive) become the bottleneck under fan-out.
+MAX_CONNS = int(os.getenv("FASTMCP_MAX_CONNS", "200"))
+MAX_KEEPALIVE = int(os.getenv("FASTMCP_MAX_KEEPALIVE", "50"))
+# Keep idle connections around between calls (httpx default: 5s).
+KEEPALIVE_EXPIRY = float(os.getenv("FASTMCP_KEEPALIVE_EXPIRY", "30"))
+# HTTP/2 multiplexes concurrent requests over one connection, but is only
+# negotiated over TLS (the local uvicorn server speaks HTTP/1.1), and needs
+# `pip install httpx[http2]`. Off by default.
+HTTP2 = os.getenv("FASTMCP_HTTP2", "0") == "1"
+
+T = TypeVar("T")
+
+
+def _httpx_client_factory(
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[httpx.Timeout] = None,
+    auth: Optional[httpx.Auth] = None,
+) -> httpx.AsyncClient:
+    """Build the transport's httpx client with our pool limits."""
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=timeout or httpx.Timeout(30.0),
+        auth=auth,
+        follow_redirects=True,
+        http2=HTTP2,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    )
 
 
+async def _measure(label: str, aw: Awaitable[T]) -> T:
+    """Await `aw` and print how long it took."""
+    start = time.perf_counter()
+    result = await aw
+    print(f"[timing] {label}: {(time.perf_counter() - start) * 1000:.1f} ms")
+    return result
+
+
+async def _fetch_all_resources(client: Client, uris: List[str]) -> List[Any]:
+    """Read all URIs concurrently over the shared session. Results keep the order of `uris`."""
+    return await asyncio.gather(*(client.read_resource(u) for u in uris))
+
 
 async def main() -> None:
-    async with Client(SERVER_URL) as client:
+    # One Client session is reused for every call below, so the connect +
+    # initialize handshake is paid once rather than per call.
+    start = time.perf_counter()
+    transport = StreamableHttpTransport(SERVER_URL, httpx_client_factory=_httpx_client_factory)
+    async with Client(transport) as client:
+        print(f"[timing] session setup: {(time.perf_counter() - start) * 1000:.1f} ms")
+
         print("\n=== Tools ===")
-        for t in await client.list_tools():
+        for t in await _measure("list_tools (first call)", client.list_tools()):
             print(f"- {t.name}")
 
-        print("\n=== Call: incident_pack (structured output + resource URIs) ===")
-        pack = json.loads(pack_resp.content[0].text)
+        pack = combined["pack"]
+
+        print("\n=== Call: incident_pack_with_plan (structured output + resource URIs) ===")
         print(json.dumps(pack, indent=2))
 
         print("\n=== Fetch suggested resources from incident_pack ===")
 
-        print("\n=== Create research plan (tool -> resource URI) ===")
-        created = json.loads(created_resp.content[0].text)
+        print("\n=== Research plan created by the same call (tool -> resource URI) ===")
+        created = {"case_id": combined["case_id"], "resource_uri": combined["resource_uri"]}
         print(json.dumps(created, indent=2))
 
         print("\n=== Read research plan resource ===")
-        plan = await client.read_resource(created["resource_uri"])
         print(plan[0].text)
 
         print("\n=== Get prompt: ask_clarifying_questions ===")
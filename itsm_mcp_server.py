@@ -11,12 +11,21 @@ Transport:
 
 from __future__ import annotations
 
-import json
+import atexit
+import functools
+import hashlib
+import itertools
+import logging
 import os
+import queue
+import re
+import threading
 import time
-import uuid
+from collections import OrderedDict
 from typing import Any, Dict, List, Literal, Optional, Tuple
 
+import orjson
+import uvicorn
 from fastmcp import FastMCP
 from fastmcp.prompts import Message
 from starlette.requests import Request
@@ -24,30 +33,116 @@ from starlette.responses import PlainTextResponse
 
 
 AUDIT_LOG = os.getenv("ITSM_AUDIT_LOG", "./itsm_audit.jsonl")
+# By default packs are audited as a digest + category/severity; set to 1 to log full packs.
+AUDIT_VERBOSE = os.getenv("ITSM_AUDIT_VERBOSE", "0") == "1"
+
+
+# FastMCP's default tool serializer (pydantic_core.to_json) already emits compact JSON.
 mcp = FastMCP(name="ITSM Service Desk (Enterprise) - Simplified")
 
 # In-memory store for lab purposes (not durable).
-_CASE_STORE: Dict[str, Dict[str, Any]] = {}
+# Bounded LRU: once full, the least recently used case is evicted.
+# At least 1, so the case just created is never evicted before its URI is returned.
+_CASE_STORE_MAX = max(1, int(os.getenv("ITSM_CASE_CACHE", "10000")))
+_CASE_STORE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+# Case ids are <pid>-<sequence>: unique within this in-memory store and
+# cheaper than a random UUID per case. Not meant to be unguessable.
+_CASE_SEQ = itertools.count(1)
 
 
 def _now_ms() -> int:
     return int(time.time() * 1000)
 
 
+# Audit records are written by a background thread so tool calls never touch
+# the filesystem; _audit() only enqueues.
+_AUDIT_Q: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+_AUDIT_STOP = object()
+# Opened here, not in the worker, so a bad ITSM_AUDIT_LOG path fails at startup.
+_AUDIT_FILE = open(AUDIT_LOG, "ab", buffering=1 << 16)
+
+logger = logging.getLogger("itsm")
+
+
+def _audit_worker() -> None:
+    """
+    Drain _AUDIT_Q into _AUDIT_FILE, flushing whenever the queue goes idle.
+    A record that fails to serialize or write is logged and skipped.
+    """
+    f = _AUDIT_FILE
+    try:
+        while True:
+            item = _AUDIT_Q.get()
+            if item is _AUDIT_STOP:
+                return
+            try:
+                event_type, payload, ts_ms = item
+                record = {"ts_ms": ts_ms, "event_type": event_type, "payload": payload}
+                f.write(orjson.dumps(record, default=_audit_default, option=orjson.OPT_APPEND_NEWLINE))
+                if _AUDIT_Q.empty():
+                    f.flush()
+            except Exception:
+                logger.exception("Failed to write audit record to %s", AUDIT_LOG)
+    finally:
+        f.close()
+
+
+_AUDIT_THREAD = threading.Thread(target=_audit_worker, name="itsm-audit", daemon=True)
+_AUDIT_THREAD.start()
+
+
+@atexit.register
+def _audit_close() -> None:
+    # Records queued before the stop marker are written and the file is closed.
+    _AUDIT_Q.put(_AUDIT_STOP)
+    _AUDIT_THREAD.join(timeout=5)
+
+
 def _audit(event_type: str, payload: Dict[str, Any]) -> None:
-    record = {"ts_ms": _now_ms(), "event_type": event_type, "payload": payload}
-    with open(AUDIT_LOG, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    # Nothing drains the queue once the writer is gone; fail the call instead of losing records.
+    if not _AUDIT_THREAD.is_alive():
+        raise RuntimeError(f"Audit writer for {AUDIT_LOG} is not running")
+    _AUDIT_Q.put((event_type, payload, _now_ms()))
+
+
+class _PackDigest:
+    """
+    Reference to a (shared, never mutated) incident pack whose digest is
+    computed by the audit thread when the record is written.
+    """
+    __slots__ = ("pack",)
+
+    def __init__(self, pack: Dict[str, Any]) -> None:
+        self.pack = pack
+
+
+def _audit_default(obj: Any) -> Any:
+    if isinstance(obj, _PackDigest):
+        pack = obj.pack
+        return {
+            "result_blake2b": hashlib.blake2b(orjson.dumps(pack), digest_size=8).hexdigest(),
+            "category": pack["incident"]["category"],
+            "severity": pack["incident"]["severity"],
+        }
+    raise TypeError(f"Cannot audit {type(obj).__name__}")
+
+
+def _audit_pack(pack: Dict[str, Any]) -> Any:
+    """
+    What the audit log records for an incident pack.
+    """
+    if AUDIT_VERBOSE:
+        return pack
+    return _PackDigest(pack)
 
 
+# Tools normalize their arguments once with _norm(); the helpers below
+# expect already-normalized (stripped, lowercase) values.
 def _norm(s: str) -> str:
     return (s or "").strip().lower()
 
 
-def _severity_from_impact_urgency(impact: str, urgency: str) -> Literal["low", "medium", "high", "critical"]:
-    impact = _norm(impact)
-    urgency = _norm(urgency)
-
+def _severity_rule(impact: str, urgency: str) -> Literal["low", "medium", "high", "critical"]:
     if impact == "high" and urgency == "high":
         return "critical"
     if (impact == "high" and urgency in ("medium", "low")) or (urgency == "high" and impact in ("medium", "low")):
@@ -57,26 +152,39 @@ def _severity_from_impact_urgency(impact: str, urgency: str) -> Literal["low", "
     return "low"
 
 
+_SEV_TABLE: Dict[Tuple[str, str], Literal["low", "medium", "high", "critical"]] = {
+    (i, u): _severity_rule(i, u) for i in ("low", "medium", "high") for u in ("low", "medium", "high")
+}
+
+
+def _severity_from_impact_urgency(impact: str, urgency: str) -> Literal["low", "medium", "high", "critical"]:
+    # Anything outside low/medium/high maps to "low", same as _severity_rule.
+    return _SEV_TABLE.get((impact, urgency), "low")
+
+
+# Checked in order; the first category with a matching keyword wins.
+# Keywords match anywhere in the text (substring), so "passwords" hits "password".
+_CATEGORY_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "network": ("vpn", "wifi", "network", "dns", "latency", "packet loss"),
+    "identity_access": ("login", "sso", "oauth", "saml", "password", "mfa", "2fa"),
+    "platform": ("kubernetes", "k8s", "docker", "container", "pod", "deployment"),
+    "email_collaboration": ("email", "outlook", "exchange", "mailbox"),
+}
+# One alternation per category: a single scan instead of one `in` per keyword.
+_CATEGORY_PATTERNS: "Dict[str, re.Pattern[str]]" = {
+    cat: re.compile("|".join(map(re.escape, keywords))) for cat, keywords in _CATEGORY_KEYWORDS.items()
+}
+
+
 def _category_guess(text: str) -> str:
     t = (text or "").lower()
-    if any(k in t for k in ["vpn", "wifi", "network", "dns", "latency", "packet loss"]):
-        return "network"
-    if any(k in t for k in ["login", "sso", "oauth", "saml", "password", "mfa", "2fa"]):
-        return "identity_access"
-    if any(k in t for k in ["kubernetes", "k8s", "docker", "container", "pod", "deployment"]):
-        return "platform"
-    if any(k in t for k in ["email", "outlook", "exchange", "mailbox"]):
-        return "email_collaboration"
+    for cat, pattern in _CATEGORY_PATTERNS.items():
+        if pattern.search(t):
+            return cat
     return "general"
 
 
-def _triage_next_steps(category: str, severity: str) -> List[str]:
-    """
-    Small, teachable list: 3–4 steps.
-    """
-    cat = _norm(category)
-    sev = _norm(severity)
-
+def _build_triage_steps(cat: str, sev: str) -> List[str]:
     base = [
         "Confirm scope (how many users/regions) and exact start time",
         "Capture exact error message(s) + timestamps",
@@ -97,114 +205,184 @@ def _triage_next_steps(category: str, severity: str) -> List[str]:
     return base[:4]
 
 
-def _kb_catalog() -> Dict[str, Dict[str, Any]]:
+# Every category/severity pair is known up front, so build the steps once.
+_TRIAGE_TABLE: Dict[Tuple[str, str], Tuple[str, ...]] = {
+    (cat, sev): tuple(_build_triage_steps(cat, sev))
+    for cat in (*_CATEGORY_KEYWORDS, "general")
+    for sev in ("low", "medium", "high", "critical")
+}
+
+
+def _triage_next_steps(category: str, severity: str) -> List[str]:
     """
-    Minimal KB metadata used for suggesting KB resource URIs.
+    Small, teachable list: 3–4 steps.
     """
-    return {
-        "kb-1001": {
-            "title": "VPN Troubleshooting",
-            "tags": ["vpn", "network", "connectivity"],
-            "categories": ["network"],
-        },
-        "kb-2001": {
-            "title": "SSO Login Failures",
-            "tags": ["sso", "saml", "oauth", "mfa", "login"],
-            "categories": ["identity_access"],
-        },
-        "kb-3001": {
-            "title": "Password Reset (Standard)",
-            "tags": ["password", "login", "mfa"],
-            "categories": ["identity_access"],
-        },
-    }
+    steps = _TRIAGE_TABLE.get((category, severity))
+    return list(steps) if steps is not None else _build_triage_steps(category, severity)
+
+
+# Minimal KB metadata used for suggesting KB resource URIs.
+_KB_CATALOG: Dict[str, Dict[str, Any]] = {
+    "kb-1001": {
+        "title": "VPN Troubleshooting",
+        "tags": ["vpn", "network", "connectivity"],
+        "categories": ["network"],
+    },
+    "kb-2001": {
+        "title": "SSO Login Failures",
+        "tags": ["sso", "saml", "oauth", "mfa", "login"],
+        "categories": ["identity_access"],
+    },
+    "kb-3001": {
+        "title": "Password Reset (Standard)",
+        "tags": ["password", "login", "mfa"],
+        "categories": ["identity_access"],
+    },
+}
+
+# KB article bodies served by the itsm://kb/{article_id} resource.
+_KB_BODIES: Dict[str, str] = {
+    "kb-1001": "KB-1001: VPN Troubleshooting\n- Confirm VPN client version\n- Collect logs\n- Check known outages\n",
+    "kb-2001": "KB-2001: SSO Login Failures\n- Check IdP status\n- Confirm MFA method\n- Verify app SAML config changes\n",
+    "kb-3001": "KB-3001: Password Reset (Standard)\n- Verify identity\n- Reset via IAM portal\n- Confirm enrollment in MFA\n",
+}
+
+# Served by the itsm://policies/incident-severity resource.
+_POLICY_TEXT = """# Incident Severity Policy (Snapshot)
+
+- Critical: major service down / widespread customer impact / safety or compliance risk
+- High: significant degradation or many users impacted
+- Medium: limited impact, workaround exists
+- Low: minor issue or single user impact
+
+Always follow your org’s paging + incident commander rules for High/Critical.
+"""
+
+
+def _kb_index(field: str) -> Dict[str, List[str]]:
+    """
+    Inverted index over _KB_CATALOG: value of `field` -> article ids.
+    """
+    index: Dict[str, List[str]] = {}
+    for aid, meta in _KB_CATALOG.items():
+        for key in meta.get(field, []):
+            index.setdefault(key, []).append(aid)
+    return index
+
+
+# Built once at import so ranking is a handful of index lookups.
+_KB_TAG_INDEX = _kb_index("tags")
+_KB_CATEGORY_INDEX = _kb_index("categories")
+_KB_TITLES = {aid: meta.get("title", "").lower() for aid, meta in _KB_CATALOG.items()}
 
 
 def _rank_kb(category: str, query_text: str, max_results: int) -> List[str]:
-    cat = _norm(category)
     q = (query_text or "").lower()
-    catalog = _kb_catalog()
-
-    scored: List[Tuple[str, int]] = []
-    for aid, meta in catalog.items():
-        score = 0
-        if cat in meta.get("categories", []):
-            score += 3
-        for tag in meta.get("tags", []):
-            if tag in q:
-                score += 2
-        if meta.get("title", "").lower() in q:
-            score += 1
-        scored.append((aid, score))
 
+    # Seeded in catalog order so ties keep the catalog ordering.
+    scores = dict.fromkeys(_KB_CATALOG, 0)
+    for aid in _KB_CATEGORY_INDEX.get(category, ()):
+        scores[aid] += 3
+    for tag, aids in _KB_TAG_INDEX.items():
+        if tag in q:
+            for aid in aids:
+                scores[aid] += 2
+    for aid, title in _KB_TITLES.items():
+        if title in q:
+            scores[aid] += 1
+
+    scored: List[Tuple[str, int]] = list(scores.items())
     scored.sort(key=lambda x: x[1], reverse=True)
     top = [aid for aid, s in scored if s > 0][: max(1, min(max_results, 10))]
     return top
 
 
-def _build_research_plan(category: str, severity: str, short_description: str, details: str) -> Dict[str, Any]:
-    category = _norm(category)
-    severity = _norm(severity)
-    context = f"{short_description}\n{details}".strip()
-
-    if category == "identity_access":
-        hypotheses = [
+# (hypotheses, checks, evidence) per category; unknown categories use "general".
+_PLAN_SKELETONS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]] = {
+    "identity_access": (
+        (
             "Identity provider issue or outage",
             "Recent SSO config/cert change",
             "Clock skew causing token validity failures",
-        ]
-        checks = [
+        ),
+        (
             "Check IdP status + auth error patterns",
             "Review recent SSO changes (SAML/OAuth/certs)",
             "Validate time sync (NTP) for key systems",
-        ]
-        evidence = [
+        ),
+        (
             "Exact error text + timestamps + impacted app URL",
             "Auth log excerpts and request IDs if available",
             "List of affected users/groups/regions",
-        ]
-    elif category == "network":
-        hypotheses = ["Regional ISP issue", "VPN gateway saturation", "DNS issue"]
-        checks = ["Check network dashboards", "Compare affected vs unaffected regions", "Validate DNS resolution paths"]
-        evidence = ["Traceroute/ping from affected users", "VPN gateway metrics", "Time window + location map"]
-    elif category == "platform":
-        hypotheses = ["Recent deploy regression", "Dependency outage", "Resource exhaustion"]
-        checks = ["Review recent deploys", "Check service metrics/logs", "Verify dependencies health"]
-        evidence = ["Service logs around onset", "Dashboard screenshots", "Deployment IDs/change records"]
-    else:
-        hypotheses = ["Misconfiguration", "Transient outage", "User-specific issue"]
-        checks = ["Confirm scope/timeframe", "Check status dashboards", "Review recent changes"]
-        evidence = ["Error text + timestamps", "User/device context", "Steps already tried"]
-
+        ),
+    ),
+    "network": (
+        ("Regional ISP issue", "VPN gateway saturation", "DNS issue"),
+        ("Check network dashboards", "Compare affected vs unaffected regions", "Validate DNS resolution paths"),
+        ("Traceroute/ping from affected users", "VPN gateway metrics", "Time window + location map"),
+    ),
+    "platform": (
+        ("Recent deploy regression", "Dependency outage", "Resource exhaustion"),
+        ("Review recent deploys", "Check service metrics/logs", "Verify dependencies health"),
+        ("Service logs around onset", "Dashboard screenshots", "Deployment IDs/change records"),
+    ),
+    "general": (
+        ("Misconfiguration", "Transient outage", "User-specific issue"),
+        ("Confirm scope/timeframe", "Check status dashboards", "Review recent changes"),
+        ("Error text + timestamps", "User/device context", "Steps already tried"),
+    ),
+}
+# Prepended to checks/evidence for high and critical incidents.
+_HIGH_SEV_CHECK = "Start incident bridge and establish comms cadence"
+_HIGH_SEV_EVIDENCE = "Business impact summary + blast radius estimate"
+
+
+def _plan_sections(category: str, severity: str) -> Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]:
+    hypotheses, checks, evidence = _PLAN_SKELETONS.get(category, _PLAN_SKELETONS["general"])
     if severity in ("critical", "high"):
-        checks.insert(0, "Start incident bridge and establish comms cadence")
-        evidence.insert(0, "Business impact summary + blast radius estimate")
+        checks = (_HIGH_SEV_CHECK, *checks)
+        evidence = (_HIGH_SEV_EVIDENCE, *evidence)
+    return hypotheses, checks, evidence
+
+
+# Same idea as _TRIAGE_TABLE: every known category/severity pair, built once.
+_PLAN_TABLE = {
+    (cat, sev): _plan_sections(cat, sev)
+    for cat in (*_CATEGORY_KEYWORDS, "general")
+    for sev in ("low", "medium", "high", "critical")
+}
+
+
+def _build_research_plan(category: str, severity: str, short_description: str, details: str) -> Dict[str, Any]:
+    hypotheses, checks, evidence = _PLAN_TABLE.get((category, severity)) or _plan_sections(category, severity)
 
     return {
         "category": category,
         "severity": severity,
-        "incident_context": context,
-        "hypotheses": hypotheses,
-        "checks": checks,
-        "evidence_to_collect": evidence,
+        "incident_context": f"{short_description}\n{details}".strip(),
+        "hypotheses": list(hypotheses),
+        "checks": list(checks),
+        "evidence_to_collect": list(evidence),
         "note": "Guidance only. Follow your org’s incident process.",
     }
 
 
-@mcp.custom_route("/health", methods=["GET"])
-async def health(_: Request) -> PlainTextResponse:
-    return PlainTextResponse("OK")
-
-
-@mcp.tool
-def incident_pack(
+@functools.lru_cache(maxsize=1024)
+def _compute_pack(
     short_description: str,
     details: str,
-    impact: Literal["low", "medium", "high"],
-    urgency: Literal["low", "medium", "high"],
-    customer_impacting: bool = False,
-    max_kb_results: int = 3,
-) -> Dict[str, Any]:
+    impact: str,
+    urgency: str,
+    customer_impacting: bool,
+    max_kb_results: int,
+) -> Tuple[Dict[str, Any], str, str]:
+    """
+    Build the incident pack. Also returns the derived (category, severity)
+    so callers can reuse them instead of re-categorizing.
+
+    Pure function of its inputs, so results are cached: repeated tickets
+    get the same pack object back. Callers must not mutate it.
+    """
     pack = {
         "incident": {
             "summary": short_description.strip(),
@@ -220,6 +398,50 @@ def incident_pack(
         },
         "notes": "Client should fetch any URIs it wants via read_resource() and include in the prompt/context.",
     }
+    return pack, category, severity
+
+
+def _create_case(short_description: str, details: str, category: str, severity: str) -> Dict[str, Any]:
+    """
+    Build a research plan, store it as a case, and return the tool result.
+    """
+
+    _CASE_STORE[case_id] = {
+        "case_id": case_id,
+        "created_ts_ms": _now_ms(),
+        "short_description": short_description,
+        "details": details,
+        "plan": plan,
+    }
+    if len(_CASE_STORE) > _CASE_STORE_MAX:
+        _CASE_STORE.popitem(last=False)
+
+    resource_uri = f"itsm://cases/{case_id}/research-plan"
+    return {
+        "case_id": case_id,
+        "resource_uri": resource_uri,
+        "category": category,
+        "severity": severity,
+        "summary": "Research plan created. Fetch it via read_resource(resource_uri).",
+    }
+
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health(_: Request) -> PlainTextResponse:
+    return PlainTextResponse("OK")
+
+
+@mcp.tool
+async def incident_pack(
+    short_description: str,
+    details: str,
+    impact: Literal["low", "medium", "high"],
+    urgency: Literal["low", "medium", "high"],
+    customer_impacting: bool = False,
+    max_kb_results: int = 3,
+) -> Dict[str, Any]:
+    impact, urgency = _norm(impact), _norm(urgency)
+    pack, _, _ = _compute_pack(short_description, details, impact, urgency, customer_impacting, max_kb_results)
 
     _audit(
         "incident_pack",
@@ -230,14 +452,14 @@ def incident_pack(
                 "urgency": urgency,
                 "customer_impacting": customer_impacting,
             },
-            "result": pack,
+            "result": _audit_pack(pack),
         },
     )
     return pack
 
 
 @mcp.tool
-def create_research_plan(
+async def create_research_plan(
     short_description: str,
     details: str,
     category: Optional[str] = None,
@@ -245,43 +467,46 @@ def create_research_plan(
     impact: Optional[Literal["low", "medium", "high"]] = None,
     urgency: Optional[Literal["low", "medium", "high"]] = None,
 ) -> Dict[str, Any]:
+    result = _create_case(short_description, details, category=inferred_category, severity=sev)
+    _audit("create_research_plan", {"inputs": {"short_description": short_description}, "result": result})
+    return result
 
-    _CASE_STORE[case_id] = {
-        "case_id": case_id,
-        "created_ts_ms": _now_ms(),
-        "short_description": short_description,
-        "details": details,
-        "plan": plan,
-    }
 
-    resource_uri = f"itsm://cases/{case_id}/research-plan"
-    result = {
-        "case_id": case_id,
-        "resource_uri": resource_uri,
-        "category": inferred_category,
-        "severity": sev,
-        "summary": "Research plan created. Fetch it via read_resource(resource_uri).",
-    }
-    _audit("create_research_plan", {"inputs": {"short_description": short_description}, "result": result})
+@mcp.tool
+async def incident_pack_with_plan(
+    short_description: str,
+    details: str,
+    impact: Literal["low", "medium", "high"],
+    urgency: Literal["low", "medium", "high"],
+    customer_impacting: bool = False,
+    max_kb_results: int = 3,
+) -> Dict[str, Any]:
+    result = {"pack": pack, "case_id": created["case_id"], "resource_uri": created["resource_uri"]}
+    _audit(
+        "incident_pack_with_plan",
+        {
+            "inputs": {
+                "short_description": short_description,
+                "impact": impact,
+                "urgency": urgency,
+                "customer_impacting": customer_impacting,
+            },
+            "result": {**result, "pack": _audit_pack(pack)},
+        },
+    )
     return result
 
 
 @mcp.resource("itsm://policies/incident-severity")
-def incident_severity_policy() -> str:
-def kb_article(article_id: str) -> str:
+async def incident_severity_policy() -> str:
+async def kb_article(article_id: str) -> str:
     """
     Tiny KB resource stub. In a real setup, this would query ServiceNow KB, Confluence, etc.
     """
-    aid = _norm(article_id)
-    kb = {
-        "kb-1001": "KB-1001: VPN Troubleshooting\n- Confirm VPN client version\n- Collect logs\n- Check known outages\n",
-        "kb-2001": "KB-2001: SSO Login Failures\n- Check IdP status\n- Confirm MFA method\n- Verify app SAML config changes\n",
-        "kb-3001": "KB-3001: Password Reset (Standard)\n- Verify identity\n- Reset via IAM portal\n- Confirm enrollment in MFA\n",
-    }
-    return kb.get(aid, f"No KB article found for {article_id}.")
+    return _KB_BODIES.get(_norm(article_id), f"No KB article found for {article_id}.")
 
 
-def case_research_plan(case_id: str) -> str:
+async def case_research_plan(case_id: str) -> str:
     """
     Read the research plan for a previously created case.
     Lab simplicity: uses in-memory storage.
@@ -290,6 +515,7 @@ def case_research_plan(case_id: str) -> str:
     entry = _CASE_STORE.get(cid)
     if not entry:
         return f"No research plan found for case_id={case_id}. Create one via tool create_research_plan()."
+    _CASE_STORE.move_to_end(cid)
 
     plan = entry.get("plan", {})
 
@@ -305,4 +531,8 @@ def ask_clarifying_questions(category: str, severity: str) -> List[Message]:
 if __name__ == "__main__":
     # Streamable HTTP transport
     # MCP endpoint: http://localhost:8000/mcp
-    mcp.run(transport="http", host="127.0.0.1", port=8000)
+    # Run the ASGI app under uvicorn directly so it creates the event loop and
+    # picks uvloop/httptools when installed (uvicorn[standard]).
+    # Single worker on purpose: _CASE_STORE and MCP sessions live in process
+    # memory, so separate workers would not see each other's cases/sessions.
+    uvicorn.run(mcp.http_app(), host="127.0.0.1", port=8000, loop="auto", http="auto")
@@ -287,6 +287,30 @@ def vector_search_knowledge(query: str, top_k: int = 5, category: str = None) ->
     """
     return _vector_search_knowledge_internal(query, top_k, category)
 
+@mcp.tool
+def embed_query(query: str) -> dict:
+    """
+    Embed a query with the server's embedding model.
+
+    Lets clients compare queries by meaning (e.g. a semantic response cache)
+    without loading their own embedding model.
+
+    Parameters
+    ----------
+    query : str
+        Text to embed
+
+    Returns
+    -------
+    dict
+        {"embedding": list of floats (unit length), "dim": int}
+    """
+    try:
+        embedding = _get_embed_model().encode(query, normalize_embeddings=True).tolist()
+        return {"embedding": embedding, "dim": len(embedding)}
+    except Exception as e:
+        return {"error": str(e)}
+
 @mcp.tool
 def get_knowledge_for_query(category: str, query: str, top_k: int = 3) -> dict:
     """
@@ -426,6 +450,7 @@ if __name__ == "__main__":
     print("  [Knowledge Retrieval] ")
     print("    • vector_search_knowledge - Semantic search through support docs")
     print("    • get_knowledge_for_query - Category-specific knowledge retrieval")
+    print("    • embed_query - Query embedding (for client-side semantic caching)")
     print("  [Classification] ")
     print("    • list_canonical_queries - Show available support categories")
     print("    • classify_canonical_query - Match user intent to category")
@@ -18,14 +18,22 @@ KNOWLEDGE SOURCES (all accessed via MCP):
 """
 
 import asyncio
+import importlib
 import json
+import logging
 import os
 import re
-from typing import Optional
-
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+import anyio
+import httpx
+import numpy as np
 from fastmcp import Client
 from fastmcp.exceptions import ToolError
-from langchain_ollama import ChatOllama
+from mcp.shared.exceptions import McpError
 
 # ╔══════════════════════════════════════════════════════════════════╗
 # 1. Configuration                                                   ║
@@ -33,6 +41,16 @@ from langchain_ollama import ChatOllama
 MCP_ENDPOINT = "http://127.0.0.1:8000/mcp/"
 TOP_K        = 3
 MODEL        = os.getenv("OLLAMA_MODEL", "llama3.2")
+KEEPALIVE_S  = 30      # ping interval that keeps the shared MCP session from idling out
+TEMPLATE_TTL_S = 300   # how long a category's prompt template is reused before re-fetching
+
+# Workflow progress ([1/4] ..., [CACHE], [INFO] ...) is logged at INFO; set RAG_VERBOSE=1 to see it
+logger = logging.getLogger("rag_agent")
+
+# Semantic response cache: a query whose embedding is at least this cosine-similar
+# to an earlier one (same workflow) reuses that answer instead of calling the LLM
+CACHE_THRESHOLD = float(os.getenv("RAG_CACHE_THRESHOLD", "0.9"))
+CACHE_SIZE      = 512
 
 # ANSI color codes for terminal output
 BLUE = "\033[34m"      # Dark blue for LLM responses
@@ -44,219 +62,459 @@ RESET = "\033[0m"      # Reset to default color
 SUPPORT_KEYWORDS = {
 }
 
+# Question patterns that indicate a support need
+SUPPORT_PATTERNS = [
+]
+
+# Every non-exploratory keyword and support pattern folded into one regex at
+# import time, so routing a query is a single search rather than a loop per keyword
+_SUPPORT_RE = re.compile("|".join(
+    [re.escape(keyword)
+     for category, keywords in SUPPORT_KEYWORDS.items() if category != "exploratory"
+     for keyword in keywords]
+    + [f"(?:{pattern})" for pattern in SUPPORT_PATTERNS]
+))
+
+# Single-word keywords as a set: most support queries contain one as a whole word,
+# which settles routing with a few hash lookups before falling back to the regex
+_SUPPORT_TOKENS = frozenset(
+    keyword
+    for category, keywords in SUPPORT_KEYWORDS.items() if category != "exploratory"
+    for keyword in keywords if " " not in keyword
+)
+
 # ╔══════════════════════════════════════════════════════════════════╗
 # 2. Helper Functions                                                ║
 # ╚══════════════════════════════════════════════════════════════════╝
+# One MCP session shared by every query (opened on first use, closed by close_mcp)
+_mcp_client: Optional[Client] = None
+_mcp_lock = asyncio.Lock()
+_keepalive_task: Optional[asyncio.Task] = None
+
+# Errors that mean the session itself is broken, as opposed to one bad query
+_SESSION_ERRORS = (httpx.TransportError, anyio.ClosedResourceError, anyio.BrokenResourceError, McpError)
+
+async def get_mcp() -> Client:
+    """Return the shared MCP client, connecting on first use or after a failure."""
+    global _mcp_client, _keepalive_task
+    async with _mcp_lock:
+        if _mcp_client is None or not _mcp_client.is_connected():
+            client = Client(MCP_ENDPOINT)
+            await client.__aenter__()
+            _mcp_client = client
+        if _keepalive_task is None:
+            _keepalive_task = asyncio.create_task(_keepalive())
+        return _mcp_client
+
+async def reset_mcp(client: Optional[Client] = None) -> None:
+    """
+    Drop the shared client so the next get_mcp() opens a fresh session.
+    With `client`, only if it is still the shared one (a newer session is kept).
+    """
+    global _mcp_client
+    async with _mcp_lock:
+        if client is not None and client is not _mcp_client:
+            return
+        client, _mcp_client = _mcp_client, None
+    if client is not None:
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception:
+            pass
+
+async def reset_mcp_if_broken(error: Exception, client: Optional[Client] = None) -> None:
+    """
+    Reset the shared session only for transport/session failures. Other errors
+    (a bad template, an unexpected result shape) leave it open for the queries
+    still using it.
+    """
+    if isinstance(error, _SESSION_ERRORS) or (client is not None and not client.is_connected()):
+        await reset_mcp(client)
+
+async def close_mcp() -> None:
+    """Stop the keep-alive task and close the shared session (call on shutdown)."""
+    global _keepalive_task
+    if _keepalive_task is not None:
+        _keepalive_task.cancel()
+        _keepalive_task = None
+    await reset_mcp()
+
+async def _keepalive() -> None:
+    """Ping the server periodically; a failed ping forces a reconnect on next use."""
+    while True:
+        await asyncio.sleep(KEEPALIVE_S)
+        client = _mcp_client
+        if client is None:
+            continue
+        try:
+            await client.ping()
+        except Exception:
+            await reset_mcp(client)
+
 async def check_server_running() -> bool:
     """Check if the MCP classification server is running."""
     try:
-        # Try to actually connect to the MCP server
-        async with Client(MCP_ENDPOINT) as mcp:
-            # Try to list available tools - if this works, server is running
-            await mcp.list_tools()
-            return True
+        # Try to list available tools - if this works, server is running
+        mcp = await get_mcp()
+        await mcp.list_tools()
+        return True
     except Exception:
+        await reset_mcp()
         return False
 
 def unwrap(obj):
     """Unwrap FastMCP result objects."""
-    if hasattr(obj, "structured_content") and obj.structured_content:
-        return unwrap(obj.structured_content)
-    if hasattr(obj, "data") and obj.data:
-        return unwrap(obj.data)
-    if isinstance(obj, list) and len(obj) == 1:
-        return unwrap(obj[0])
-    return obj
+    while True:
+        inner = getattr(obj, "structured_content", None) or getattr(obj, "data", None)
+        if inner:
+            obj = inner
+        elif isinstance(obj, list) and len(obj) == 1:
+            obj = obj[0]
+        else:
+            return obj
 
 def format_response(response: str) -> str:
     """Format response with colors - blue for content, cyan for sources."""
-    # Split on the sources divider
-    if "\n---\n*Sources:" in response:
-        parts = response.split("\n---\n*Sources:")
-        content = parts[0]
-        sources = "*Sources:" + parts[1]
-        return f"{BLUE}{content}{RESET}\n---\n{CYAN}{sources}{RESET}"
-    else:
-        # No sources, just color the whole response
-        return f"{BLUE}{response}{RESET}"
+    # Split on the sources divider (single pass over the response)
+    content, divider, sources = response.partition("\n---\n*Sources:")
+    # No divider means no sources: content is then the whole response
+    footer = f"\n---\n{CYAN}*Sources:{sources}{RESET}" if divider else ""
+    return f"{BLUE}{content}{RESET}{footer}"
 
 def is_support_query(query: str) -> bool:
     query_lower = query.lower()
+    if not _SUPPORT_TOKENS.isdisjoint(query_lower.split()):
+        return True
+    return _SUPPORT_RE.search(query_lower) is not None
 
-    # Check for support-related keywords
-    for category, keywords in SUPPORT_KEYWORDS.items():
-        if category == "exploratory":
-            continue
-        for keyword in keywords:
-            if keyword in query_lower:
-                return True
-
-    # Check for question patterns that indicate support need
-    support_patterns = [
-    ]
+class SemanticCache:
+    """
+    LRU cache of LLM responses looked up by query meaning rather than exact text.
 
-    for pattern in support_patterns:
-        if re.search(pattern, query_lower):
-            return True
+    Embeddings live in one preallocated (capacity, d) float32 matrix (allocated
+    on the first insert, once d is known) alongside a list of responses. Rows are
+    L2-normalized on insert, so a lookup is a single matrix-vector product, and
+    eviction overwrites the least recently used row in place.
+    """
 
-    return False
+    def __init__(self, threshold: float = CACHE_THRESHOLD, capacity: int = CACHE_SIZE):
+        self.threshold = threshold
+        self.capacity = capacity
+        self._matrix: Optional[np.ndarray] = None
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        self._responses: list[str] = []
+        self._clock = 0
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    def _touch(self, i: int) -> None:
+        self._clock += 1
+        self._last_used[i] = self._clock
+
+    def lookup(self, embedding: Optional[np.ndarray]) -> Optional[str]:
+        """Return the cached response for the most similar query, if similar enough."""
+        n = len(self._responses)
+        if embedding is None or n == 0:
+            return None
+        scores = self._matrix[:n] @ self._normalize(embedding)
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            return None
+        self._touch(best)
+        return self._responses[best]
+
+    def insert(self, embedding: Optional[np.ndarray], response: str) -> None:
+        """Store a response, overwriting the least recently used entry when full."""
+        if embedding is None:
+            return
+        embedding = self._normalize(embedding)
+        if self._matrix is None:
+            self._matrix = np.empty((self.capacity, embedding.shape[0]), dtype=np.float32)
+        if len(self._responses) < self.capacity:
+            slot = len(self._responses)
+            self._responses.append(response)
+        else:
+            slot = int(self._last_used.argmin())
+            self._responses[slot] = response
+        self._matrix[slot] = embedding
+        self._touch(slot)
+
+# One cache per workflow so a support answer is never served for an exploratory query
+_RESPONSE_CACHE = {"support": SemanticCache(), "rag": SemanticCache()}
+
+# One chat client for the whole process so the HTTP connection to Ollama is reused.
+# Created on first use: importing langchain_ollama pulls in langchain-core and
+# slows startup, and the banner/server check don't need it.
+_llm = None
+
+def get_llm():
+    """Return the shared ChatOllama client (use .bind(temperature=...) for per-call overrides)."""
+    global _llm
+    if _llm is None:
+        from langchain_ollama import ChatOllama
+        _llm = ChatOllama(model=MODEL, temperature=0.3)
+    return _llm
+
+async def generate(messages: list, on_token: Optional[Callable[[str], None]] = None) -> str:
+    """Run the chat model; with on_token, stream tokens to it as they arrive."""
+    if on_token is None:
+        return (await get_llm().ainvoke(messages)).content
+    parts = []
+    async for chunk in get_llm().astream(messages):
+        on_token(chunk.content)
+        parts.append(chunk.content)
+    return "".join(parts)
+
+async def embed_query(mcp: Client, query: str) -> Optional[np.ndarray]:
+    """Embed a query via the MCP server; None if unavailable (caching is then skipped)."""
+    try:
+        result = unwrap(await mcp.call_tool("embed_query", {"query": query}))
+        if isinstance(result, dict) and "embedding" in result:
+            return np.asarray(result["embedding"], dtype=np.float32)
+    except Exception:
+        pass
+    return None
 
 # ╔══════════════════════════════════════════════════════════════════╗
 # 3. Customer Support Classification Workflow                        ║
 # ╚══════════════════════════════════════════════════════════════════╝
-async def handle_canonical_query_with_classification(user_query: str) -> str:
-    """
-    Handle customer support queries using the 4-step classification workflow.
-    """
-    async with Client(MCP_ENDPOINT) as mcp:
-        try:
-            print("[1/4] Classifying support query...")
-            classification = unwrap(classify_result)
+# Prompt templates are static per category: category -> (fetched_at, template_info)
+_TEMPLATE_CACHE: dict[str, tuple[float, dict]] = {}
 
-            if not isinstance(classification, dict):
-                return f"Classification error: Expected dict, got {type(classification)}"
+def cached_template(category: str) -> Optional[dict]:
+    """Return the cached template info for a category if it is still fresh."""
+    entry = _TEMPLATE_CACHE.get(category)
+    if entry and time.monotonic() - entry[0] < TEMPLATE_TTL_S:
+        return entry[1]
+    return None
 
-            confidence = classification.get("confidence", 0)
-
-            if not suggested_category:
-                return "I couldn't determine the type of support you need. Please try rephrasing your question."
-
-            print(f"[Result] Category: {suggested_category} (confidence: {confidence:.2f})")
+async def retrieve_support_context(user_query: str, verbose: bool = True):
+    """
+    Steps 1-3 of the support workflow (MCP only): classify the query, then fetch
+    its template and knowledge. Returns (category, template_info, knowledge_info),
+    or an error message string. Prefetched queries run this with verbose=False.
+    """
+    say = logger.info if verbose else logger.debug
+    mcp = await get_mcp()
 
-            # Step 2: Get the prompt template for this category
-            template_info = unwrap(template_result)
+    say("[1/4] Classifying support query...")
+    classification = unwrap(classify_result)
 
-            if "error" in template_info:
-                return f"Template error: {template_info['error']}"
+    if not isinstance(classification, dict):
+        return f"Classification error: Expected dict, got {type(classification)}"
 
-            template = template_info.get("template", "")
-            description = template_info.get("description", "")
+    confidence = classification.get("confidence", 0)
 
-            # Step 3: Retrieve relevant knowledge
-            knowledge_info = unwrap(knowledge_result)
+    if not suggested_category:
+        return "I couldn't determine the type of support you need. Please try rephrasing your question."
 
-            if "error" in knowledge_info:
-                return f"Knowledge retrieval error: {knowledge_info['error']}"
+    say("[Result] Category: %s (confidence: %.2f)", suggested_category, confidence)
 
-            knowledge = knowledge_info.get("knowledge", "")
-            sources = knowledge_info.get("sources", [])
+    # Steps 2 + 3: Template and knowledge both depend only on the category,
+    # so fetch them concurrently (one round-trip instead of two); a cached
+    # template leaves only the knowledge call
+    template_info = cached_template(suggested_category)
+    return suggested_category, template_info, unwrap(knowledge_result)
 
-            if not knowledge or knowledge == "No relevant documentation found.":
-                print("[WARNING] No specific documentation found, using general template")
-                knowledge = f"General support information for {description}"
+async def handle_canonical_query_with_classification(
+    user_query: str, on_token: Optional[Callable[[str], None]] = None
+) -> str:
+    """
+    Handle customer support queries using the 4-step classification workflow.
+    If on_token is given, the LLM answer is streamed to it as it is generated.
+    """
+    mcp = None
+    try:
+        mcp = await get_mcp()
+        prefetched = await take_prefetched(user_query)  # (embedding, context) or None
+        query_embedding = prefetched[0] if prefetched else await embed_query(mcp, user_query)
+        cached = _RESPONSE_CACHE["support"].lookup(query_embedding)
+        if cached is not None:
+            logger.info("[CACHE] Reusing response from a similar earlier query")
+            return cached
 
-            print(f"[INFO] Retrieved {len(sources)} source(s)")
+        context = prefetched[1] if prefetched else await retrieve_support_context(user_query)
+        if isinstance(context, str):
+            return context
+        suggested_category, template_info, knowledge_info = context
 
-            # Step 4: Execute LLM with template + knowledge
+        if "error" in template_info:
+            return f"Template error: {template_info['error']}"
 
-            try:
-                llm = ChatOllama(model=MODEL, temperature=0.3)
+        template = template_info.get("template", "")
+        description = template_info.get("description", "")
 
+        if "error" in knowledge_info:
+            return f"Knowledge retrieval error: {knowledge_info['error']}"
 
-                response = llm.invoke([
-                    {"role": "system", "content": system_msg},
-                    {"role": "user", "content": formatted_prompt}
-                ])
+        knowledge = knowledge_info.get("knowledge", "")
+        sources = knowledge_info.get("sources", [])
 
-                result = response.content.strip()
+        if not knowledge or knowledge == "No relevant documentation found.":
+            logger.warning("[WARNING] No specific documentation found, using general template")
+            knowledge = f"General support information for {description}"
 
-                # Add source attribution if available
-                if sources:
-                    result += "\n\n---\n*Sources: " + ", ".join(set(sources)) + "*"
+        logger.info("[INFO] Retrieved %s source(s)", len(sources))
 
-                print(f"[SUCCESS] Response generated ({len(result)} chars)")
-                return result
+        # Step 4: Execute LLM with template + knowledge
 
-            except Exception as llm_error:
-                print(f"[WARNING] LLM error: {llm_error}")
-                # Fallback response
-                fallback = f"**Support Category: {suggested_category.replace('_', ' ').title()}**\n\n"
-                fallback += f"{description}\n\n"
-                if knowledge and knowledge != "No relevant documentation found.":
-                    fallback += "**Relevant Information:**\n"
-                    fallback += knowledge[:500] + "..." if len(knowledge) > 500 else knowledge
-                else:
-                    fallback += "Please contact our support team for assistance with your specific issue."
-                return fallback
+        try:
 
-        except ToolError as e:
-            return f"MCP error: {e}"
-        except Exception as e:
-            return f"Unexpected error: {e}"
+            response = await generate([
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": formatted_prompt}
+            ], on_token)
+
+            result = response.strip()
+
+            # Add source attribution if available
+            if sources:
+                result += "\n\n---\n*Sources: " + ", ".join(dict.fromkeys(sources)) + "*"
+
+            _RESPONSE_CACHE["support"].insert(query_embedding, result)
+            if on_token is None:  # a streamed answer is already on screen
+                logger.info("[SUCCESS] Response generated (%s chars)", len(result))
+            return result
+
+        except Exception as llm_error:
+            logger.warning("[WARNING] LLM error: %s", llm_error)
+            # Fallback response
+            fallback = f"**Support Category: {suggested_category.replace('_', ' ').title()}**\n\n"
+            fallback += f"{description}\n\n"
+            if knowledge and knowledge != "No relevant documentation found.":
+                fallback += "**Relevant Information:**\n"
+                fallback += knowledge[:500] + "..." if len(knowledge) > 500 else knowledge
+            else:
+                fallback += "Please contact our support team for assistance with your specific issue."
+            return fallback
+
+    except ToolError as e:
+        return f"MCP error: {e}"
+    except Exception as e:
+        await reset_mcp_if_broken(e, mcp)
+        return f"Unexpected error: {e}"
 
 # ╔══════════════════════════════════════════════════════════════════╗
 # 4. Direct RAG Search Workflow                                      ║
 # ╚══════════════════════════════════════════════════════════════════╝
-async def handle_rag_search(user_query: str) -> str:
+async def retrieve_rag_context(user_query: str, verbose: bool = True) -> dict:
     """
-    Handle exploratory queries using direct semantic search across all documentation.
+    MCP stage of the RAG workflow: semantic search across all documentation.
+    Prefetched queries run this with verbose=False.
     """
-    async with Client(MCP_ENDPOINT) as mcp:
-        try:
-
-            search_data = unwrap(search_result)
-
-            if "error" in search_data:
-                return f"Search error: {search_data['error']}"
+    say = logger.info if verbose else logger.debug
+    mcp = await get_mcp()
 
-            matches = search_data.get("matches", [])
-            if not matches:
-                return (
-                    "I couldn't find relevant information about that in our documentation. "
-                    "Please try rephrasing your question or contact our support team."
-                )
 
-            print(f"[INFO] Found {len(matches)} relevant documents")
+    return unwrap(search_result)
 
-            # Compile knowledge from matches
-            knowledge_parts = []
-            sources = set()
-            for match in matches[:TOP_K]:  # Use top results
-                knowledge_parts.append(match["document"])
-                if "metadata" in match and "source" in match["metadata"]:
-                    sources.add(match["metadata"]["source"])
-
-            combined_knowledge = "\n\n---\n\n".join(knowledge_parts)
-
-            # Generate response using LLM
-            try:
-                llm = ChatOllama(model=MODEL, temperature=0.3)
-
-                system_msg = (
-                )
+async def handle_rag_search(
+    user_query: str, on_token: Optional[Callable[[str], None]] = None
+) -> str:
+    """
+    Handle exploratory queries using direct semantic search across all documentation.
+    If on_token is given, the LLM answer is streamed to it as it is generated.
+    """
+    mcp = None
+    try:
+        mcp = await get_mcp()
+        prefetched = await take_prefetched(user_query)  # (embedding, search_data) or None
+        query_embedding = prefetched[0] if prefetched else await embed_query(mcp, user_query)
+        cached = _RESPONSE_CACHE["rag"].lookup(query_embedding)
+        if cached is not None:
+            logger.info("[CACHE] Reusing response from a similar earlier query")
+            return cached
+
+        search_data = prefetched[1] if prefetched else await retrieve_rag_context(user_query)
+
+        if "error" in search_data:
+            return f"Search error: {search_data['error']}"
+
+        matches = search_data.get("matches", [])
+        if not matches:
+            return (
+                "I couldn't find relevant information about that in our documentation. "
+                "Please try rephrasing your question or contact our support team."
+            )
+
+        logger.info("[INFO] Found %s relevant documents", len(matches))
+
+        # Compile knowledge from matches
+        top_matches = matches[:TOP_K]  # Use top results
+        knowledge_parts = [match["document"] for match in top_matches]
+        sources = dict.fromkeys(  # ordered set: first-seen order, no duplicates
+            match["metadata"]["source"] for match in top_matches
+            if "source" in match.get("metadata", {})
+        )
+
+        combined_knowledge = "\n\n---\n\n".join(knowledge_parts)
+
+        # Generate response using LLM
+        try:
+            system_msg = (
+            )
 
-                user_msg = (
-                )
+            user_msg = (
+            )
 
-                response = llm.invoke([
-                ])
+            response = await generate([
+            ], on_token)
 
-                result = response.content.strip()
+            result = response.strip()
 
-                # Add sources
-                if sources:
-                    source_list = [s.split('/')[-1] if '/' in s else s for s in sources]
-                    result += f"\n\n---\n*Sources: {', '.join(source_list)}*"
+            # Add sources
+            if sources:
+                source_list = [s.split('/')[-1] if '/' in s else s for s in sources]
+                result += f"\n\n---\n*Sources: {', '.join(source_list)}*"
 
-                return result
+            _RESPONSE_CACHE["rag"].insert(query_embedding, result)
+            return result
 
-            except Exception as llm_error:
-                print(f"[WARNING] LLM unavailable: {llm_error}")
-                # Fallback: Return the raw knowledge
-                fallback = "**Relevant Information Found:**\n\n"
-                for i, part in enumerate(knowledge_parts[:3], 1):
-                    fallback += f"{i}. {part[:200]}...\n\n"
-                if sources:
-                    fallback += f"\n*Sources: {', '.join(sources)}*"
-                return fallback
+        except Exception as llm_error:
+            logger.warning("[WARNING] LLM unavailable: %s", llm_error)
+            # Fallback: Return the raw knowledge
+            fallback = "**Relevant Information Found:**\n\n"
+            for i, part in enumerate(knowledge_parts[:3], 1):
+                fallback += f"{i}. {part[:200]}...\n\n"
+            if sources:
+                fallback += f"\n*Sources: {', '.join(sources)}*"
+            return fallback
 
-        except Exception as e:
-            return f"Search error: {e}"
+    except ToolError as e:
+        return f"Search error: {e}"
+    except Exception as e:
+        await reset_mcp_if_broken(e, mcp)
+        return f"Search error: {e}"
 
 # ╔══════════════════════════════════════════════════════════════════╗
 # 5. Main Query Router                                               ║
 # ╚══════════════════════════════════════════════════════════════════╝
-async def process_query(user_query: str) -> str:
+# MCP-stage tasks for queries typed ahead while an earlier answer was generating
+_PREFETCH: dict[str, asyncio.Task] = {}
+
+async def _prefetch(user_query: str) -> list:
+    mcp = await get_mcp()
+    retrieve = retrieve_support_context if is_support_query(user_query) else retrieve_rag_context
+    return await asyncio.gather(embed_query(mcp, user_query), retrieve(user_query, verbose=False))
+
+def start_prefetch(user_query: str) -> None:
+    """Start the embedding + retrieval MCP calls for a queued query in the background."""
+    if user_query not in _PREFETCH:
+        _PREFETCH[user_query] = asyncio.create_task(_prefetch(user_query))
+
+async def take_prefetched(user_query: str) -> Optional[list]:
+    """Return (embedding, retrieval result) if this query was prefetched, else None."""
+    task = _PREFETCH.pop(user_query, None)
+    if task is None:
+        return None
+    logger.info("[PREFETCH] Using MCP results fetched while the previous answer was generating")
+    return await task
+
+async def process_query(user_query: str, on_token: Optional[Callable[[str], None]] = None) -> str:
     """
     Route queries to appropriate workflow based on intent.
     """
@@ -265,8 +523,38 @@ async def process_query(user_query: str) -> str:
 # ╔══════════════════════════════════════════════════════════════════╗
 # 6. Command-line Interface                                          ║
 # ╚══════════════════════════════════════════════════════════════════╝
+async def warm_up() -> None:
+    """
+    Load the Ollama model in the background while the user reads the banner, so
+    the first query doesn't pay for it (the MCP session is already open from
+    check_server_running).
+    """
+    try:
+        # Only the slow import runs in a thread; the shared client is built on the loop
+        await asyncio.to_thread(importlib.import_module, "langchain_ollama")
+        await get_llm().ainvoke([{"role": "user", "content": "hi"}], options={"num_predict": 1})
+    except Exception:
+        pass  # anything still down is reported by the first query
+
+def start_input_reader(loop: asyncio.AbstractEventLoop, on_line: Callable) -> None:
+    """
+    Read stdin on a daemon thread and hand each line (None at EOF) to on_line on
+    the event loop, so the next query can be typed while an answer is generating.
+    """
+    def read_lines():
+        for line in iter(sys.stdin.readline, ""):
+            loop.call_soon_threadsafe(on_line, line.strip())
+        loop.call_soon_threadsafe(on_line, None)
+
+    threading.Thread(target=read_lines, daemon=True).start()
+
 async def demo_support_queries():
-    """Demonstrate the classification workflow with sample support queries."""
+    """
+    Demonstrate the classification workflow with sample support queries.
+
+    The queries run concurrently; Ollama only generates them in parallel when
+    started with OLLAMA_NUM_PARALLEL > 1 (otherwise it queues them).
+    """
     print("\nCustomer Support Demo")
     print("=" * 50)
 
@@ -278,15 +566,17 @@ async def demo_support_queries():
         "Can you tell me about OmniTech products?",
     ]
 
-    for query in sample_queries:
+    results = await asyncio.gather(*(process_query(query) for query in sample_queries))
+
+    for query, result in zip(sample_queries, results):
         print(f"\nUser: {query}")
         print("-" * 40)
-        result = await process_query(query)
         formatted_result = format_response(result)
         print(f"{GREEN}Agent:{RESET}\n{formatted_result}")
         print()
 
-if __name__ == "__main__":
+async def main():
+    """Interactive session; every query shares one MCP connection until exit."""
     print("=" * 70)
     print("OmniTech Customer Support RAG Agent")
     print("=" * 70)
@@ -307,7 +597,7 @@ if __name__ == "__main__":
 
     # Check if server is running
     print("\n[INFO] Checking MCP server status...")
-    server_running = asyncio.run(check_server_running())
+    server_running = await check_server_running()
 
     if not server_running:
         print("\n[WARNING] Prerequisites:")
@@ -317,6 +607,8 @@ if __name__ == "__main__":
     else:
         print("[SUCCESS] MCP classification server is running and ready.")
 
+    warm_up_task = asyncio.create_task(warm_up())
+
     print("\nCommands:")
     print("  * Type 'exit' to quit")
     print("  * Type 'demo' for sample queries")
@@ -329,13 +621,58 @@ if __name__ == "__main__":
     print("=" * 70)
     print()
 
-    while True:
-        user_input = input("Query: ").strip()
-        if user_input.lower() == "exit":
-            break
-        elif user_input.lower() == "demo":
-            asyncio.run(demo_support_queries())
-        elif user_input:
-            result = asyncio.run(process_query(user_input))
-            formatted_result = format_response(result)
-            print(f"\n{GREEN}Agent:{RESET}\n{formatted_result}\n")
+    lines: asyncio.Queue = asyncio.Queue()
+    busy = False
+
+    def on_line(line: Optional[str]) -> None:
+        # A query typed while another is running gets its MCP stage started now
+        if busy and line and line.lower() not in ("exit", "demo"):
+            start_prefetch(line)
+        lines.put_nowait((line, busy))
+
+    start_input_reader(asyncio.get_running_loop(), on_line)
+
+    try:
+        while True:
+            print("Query: ", end="", flush=True)
+            user_input, typed_ahead = await lines.get()
+            if typed_ahead and user_input is not None:
+                print(user_input)
+            if user_input is None or user_input.lower() == "exit":
+                break
+            busy = True
+            if user_input.lower() == "demo":
+                await demo_support_queries()
+            elif user_input:
+                streamed = []
+
+                def show_token(token: str) -> None:
+                    if not streamed:
+                        print(f"\n{GREEN}Agent:{RESET}\n{BLUE}", end="")
+                    streamed.append(token)
+                    print(token, end="", flush=True)
+
+                result = await process_query(user_input, on_token=show_token)
+                streamed_answer = "".join(streamed).strip()
+                if streamed_answer and result.startswith(streamed_answer):
+                    # Answer text is already on screen; finish with the sources
+                    _, divider, sources = result.partition("\n---\n*Sources:")
+                    print(RESET)
+                    if divider:
+                        print(f"---\n{CYAN}*Sources:{sources}{RESET}")
+                    print()
+                else:
+                    if streamed:
+                        # The stream broke off and the workflow fell back: show its full result
+                        print(RESET)
+                    formatted_result = format_response(result)
+                    print(f"\n{GREEN}Agent:{RESET}\n{formatted_result}\n")
+            busy = False
+    finally:
+        warm_up_task.cancel()
+        await close_mcp()
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(message)s", stream=sys.stdout)
+    logger.setLevel(logging.INFO if os.getenv("RAG_VERBOSE", "0") == "1" else logging.WARNING)
+    asyncio.run(main())
@@ -35,6 +35,10 @@ import sys                        # built-in: command-line arguments
 import re                         # built-in: regular expressions
 from fastmcp import Client        # official async JSON-RPC wrapper
 
+# Docstring section headers like "Parameters\n----------" or "Returns\n-------".
+# Compiled once here rather than re-parsed for every tool in the loop below.
+_SECTION_RE = re.compile(r'\n\s*(Parameters|Returns)\s*\n\s*[-=]+\s*\n', re.IGNORECASE)
+
 # ╔════════════════════════════════════════════════════════════════╗
 # 1.  Async entry-point                                           ║
 # ╚════════════════════════════════════════════════════════════════╝
@@ -70,50 +74,54 @@ async def main(port: int = 8000, transport: str = "mcp") -> None:
         print(f"\nDiscovered {len(tools)} tool(s):\n")
 
         for i, tool in enumerate(tools, start=1):
-            print(CYAN + "-" * 70 + RESET)
-            print(CYAN + f"Tool {i}: {tool.name}" + RESET)
-            print(CYAN + "-" * 70 + RESET)
-            print()
+            # Collect this tool's lines and write them in one call
+            lines = [
+                CYAN + "-" * 70 + RESET,
+                CYAN + f"Tool {i}: {tool.name}" + RESET,
+                CYAN + "-" * 70 + RESET,
+                "",
+            ]
 
             # Description - clean up docstring sections
             description = tool.description
             # Remove "Parameters" and "Returns" sections from docstrings
-            # Match patterns like "Parameters\n----------" or "Returns\n-------"
-            description = re.split(r'\n\s*(Parameters|Returns)\s*\n\s*[-=]+\s*\n', description, flags=re.IGNORECASE)[0]
+            description = _SECTION_RE.split(description)[0]
             description = description.strip()
 
-            print(CYAN + "Description" + RESET)
-            print(CYAN + "-----------" + RESET)
-            print(GREEN + description + RESET)
-            print()
+            lines.append(CYAN + "Description" + RESET)
+            lines.append(CYAN + "-----------" + RESET)
+            lines.append(GREEN + description + RESET)
+            lines.append("")
 
             # Parameters (inputSchema)
             if hasattr(tool, 'inputSchema') and tool.inputSchema:
-                print(CYAN + "Parameters" + RESET)
-                print(CYAN + "----------" + RESET)
+                lines.append(CYAN + "Parameters" + RESET)
+                lines.append(CYAN + "----------" + RESET)
                 schema = tool.inputSchema
                 if 'properties' in schema:
                     for param_name, param_info in schema['properties'].items():
                         param_type = param_info.get('type', 'any')
                         param_desc = param_info.get('description', 'No description')
                         required = ' (required)' if param_name in schema.get('required', []) else ''
-                        print(YELLOW + f"  {param_name}: {param_type}{required}" + RESET)
-                        print(YELLOW + f"    {param_desc}" + RESET)
+                        lines.append(YELLOW + f"  {param_name}: {param_type}{required}" + RESET)
+                        lines.append(YELLOW + f"    {param_desc}" + RESET)
                 else:
-                    print(YELLOW + "  No parameters" + RESET)
-                print()
+                    lines.append(YELLOW + "  No parameters" + RESET)
+                lines.append("")
 
             # Return information
             if hasattr(tool, 'returnType') and tool.returnType:
-                print(CYAN + "Returns" + RESET)
-                print(CYAN + "-------" + RESET)
-                print(MAGENTA + str(tool.returnType) + RESET)
-                print()
+                lines.append(CYAN + "Returns" + RESET)
+                lines.append(CYAN + "-------" + RESET)
+                lines.append(MAGENTA + str(tool.returnType) + RESET)
+                lines.append("")
             elif hasattr(tool, 'outputSchema') and tool.outputSchema:
-                print(CYAN + "Returns" + RESET)
-                print(CYAN + "-------" + RESET)
-                print(MAGENTA + str(tool.outputSchema) + RESET)
-                print()
+                lines.append(CYAN + "Returns" + RESET)
+                lines.append(CYAN + "-------" + RESET)
+                lines.append(MAGENTA + str(tool.outputSchema) + RESET)
+                lines.append("")
+
+            sys.stdout.write("\n".join(lines) + "\n")
 
 # ╔════════════════════════════════════════════════════════════════╗
 # 2.  Synchronous bootstrap                                       ║